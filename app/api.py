@@ -3,12 +3,16 @@ from pydantic import BaseModel
 from typing import Optional
 import uvicorn
 from fastapi.security import HTTPBearer
-from fastapi.responses import RedirectResponse
+from fastapi.responses import RedirectResponse, StreamingResponse
 from dotenv import load_dotenv
 from jose import jwt
 import httpx
+import json
 import os
-from main import answer_user_query
+from contextlib import asynccontextmanager
+from main import answer_user_query, stream_user_query
+from ingest_jobs import submit_job, get_job, cancel_job, IngestJobActive
+from ingest_jobs import shutdown as shutdown_ingest_jobs
 import logging
 
 # Configure logging
@@ -16,7 +20,14 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 load_dotenv()
-app = FastAPI(title="GenAI Security Policy Assistant")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # Cancel ingestion so shutdown doesn't wait for queued rebuilds to finish
+    shutdown_ingest_jobs()
+
+app = FastAPI(title="GenAI Security Policy Assistant", lifespan=lifespan)
 auth_scheme = HTTPBearer()
 
 TENANT_ID = os.getenv("TENANT_ID")
@@ -99,6 +110,23 @@ class QueryResponse(BaseModel):
     web_reference: str
     standard: str
 
+class IngestRequest(BaseModel):
+    folder: Optional[str] = None  # Subfolder of INGEST_FOLDER; defaults to INGEST_FOLDER itself
+
+class IngestJobResponse(BaseModel):
+    job_id: str
+    status: str
+    folder: str
+    namespace: Optional[str] = None
+    files_total: int
+    files_done: int
+    chunks: int
+    tokens: int
+    elapsed_seconds: float
+    chunks_per_second: float
+    tokens_per_second: float
+    error: Optional[str] = None
+
 @app.get("/login")
 def login():
     params = (
@@ -169,5 +197,62 @@ def query_policy(request: QueryRequest, creds=Security(auth_scheme)):
         standard=result["standard"]
     )
 
+# Streaming variant: one JSON object per line as each stage completes
+@app.post("/query/stream")
+def query_policy_stream(request: QueryRequest, creds=Security(auth_scheme)):
+    decoded = verify_jwt(creds.credentials)
+    check_role(decoded, ["SecurityTeam", "PolicyAdmins"])
+
+    if not request.question:
+        raise HTTPException(status_code=400, detail="Question is required.")
+
+    def events():
+        try:
+            for partial in stream_user_query(request.question):
+                yield json.dumps(partial) + "\n"
+        except Exception as e:
+            # Full detail stays in the server log; upstream error text isn't sent to clients
+            logger.error(f"Streaming query failed: {e}")
+            yield json.dumps({"error": "Query failed"}) + "\n"
+
+    logger.info(f"Streaming query: {request.question}")
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+# Ingestion endpoints (only PolicyAdmins can rebuild the index)
+@app.post("/ingest", response_model=IngestJobResponse, status_code=202)
+def start_ingest(request: IngestRequest, creds=Security(auth_scheme)):
+    decoded = verify_jwt(creds.credentials)
+    check_role(decoded, ["PolicyAdmins"])
+
+    try:
+        job = submit_job(request.folder)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except IngestJobActive as e:
+        raise HTTPException(status_code=409, detail=f"{e}; poll or cancel it first.")
+    logger.info(f"Queued ingestion job {job.job_id} for {job.folder}")
+    return IngestJobResponse(**job.snapshot())
+
+@app.get("/ingest/{job_id}", response_model=IngestJobResponse)
+def ingest_status(job_id: str, creds=Security(auth_scheme)):
+    decoded = verify_jwt(creds.credentials)
+    check_role(decoded, ["PolicyAdmins"])
+
+    job = get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Ingestion job not found.")
+    return IngestJobResponse(**job.snapshot())
+
+@app.delete("/ingest/{job_id}", response_model=IngestJobResponse)
+def cancel_ingest(job_id: str, creds=Security(auth_scheme)):
+    decoded = verify_jwt(creds.credentials)
+    check_role(decoded, ["PolicyAdmins"])
+
+    job = cancel_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Ingestion job not found.")
+    logger.info(f"Cancellation requested for ingestion job {job_id}")
+    return IngestJobResponse(**job.snapshot())
+
 if __name__ == "__main__":
     uvicorn.run(app, host="127.0.0.1", port=8000)
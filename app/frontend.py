@@ -1,26 +1,105 @@
+import json
+import os
+import requests
 import streamlit as st
-from search_online import answer_user_query
-# from your_module import answer_user_query
+from requests.adapters import HTTPAdapter
+from dotenv import load_dotenv
+
+# Thin client of the FastAPI service (api.py): no LLM, vector or guardrails
+# clients are created in the UI process, so Streamlit reruns stay cheap.
+load_dotenv()
+API_BASE_URL = os.getenv("API_BASE_URL", "http://localhost:8000")
+ANSWER_CACHE_TTL = int(os.getenv("ANSWER_CACHE_TTL", "600"))  # seconds
+
+SECTIONS = [
+    ("answer", "Answer:"),
+    ("internal_policies", "Internal Policies Used:"),
+    ("web_reference", "Web Reference Text:"),
+    ("standard", "Standard Extracted:"),
+]
+
+
+@st.cache_resource
+def get_session() -> requests.Session:
+    """One pooled HTTP session shared by every rerun and browser session."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def stream_answer(question: str, token: str):
+    """Stream /query/stream, yielding the merged result so far after each line."""
+    resp = get_session().post(
+        f"{API_BASE_URL}/query/stream",
+        json={"question": question},
+        headers={"Authorization": f"Bearer {token}"},
+        stream=True,
+        timeout=(5, 300),
+    )
+    with resp:
+        if resp.status_code != 200:
+            raise RuntimeError(f"Query failed ({resp.status_code}): {resp.text}")
+        result = {}
+        for line in resp.iter_lines():
+            if not line:
+                continue
+            partial = json.loads(line)
+            if "error" in partial:
+                raise RuntimeError(partial["error"])
+            result.update(partial)
+            yield result
+
+
+@st.cache_data(ttl=ANSWER_CACHE_TTL, show_spinner=False)
+def cached_answer(question: str, token: str, _result: dict = None) -> dict:
+    """
+    Per-question answer cache. Called without _result it is a lookup that
+    raises LookupError on a miss (exceptions are not cached); called with
+    _result it stores it. Must not make Streamlit calls, or hits replay them.
+    """
+    if _result is None:
+        raise LookupError(question)
+    return _result
+
 
 st.title("GenAI Security Policy Assistant")
 
+token = st.sidebar.text_input("API token", value=os.getenv("API_TOKEN", ""), type="password")
+
 question = st.text_input("Enter your question about company policies:")
 
 if st.button("Ask"):
-    if question.strip():
-        with st.spinner("Checking policies..."):
-            result = answer_user_query(question)
-        
-        st.subheader("Answer:")
-        st.write(result["answer"])
-        
-        st.subheader("Internal Policies Used:")
-        st.write(result["internal_policies"])
-        
-        st.subheader("Web Reference Text:")
-        st.write(result["web_reference"])
-        
-        st.subheader("Standard Extracted:")
-        st.write(result["standard"])
-    else:
+    if not question.strip():
         st.warning("Please enter a question!")
+    elif not token:
+        st.warning("Please enter an API token!")
+    else:
+        placeholders = {}
+        for key, title in SECTIONS:
+            st.subheader(title)
+            placeholders[key] = st.empty()
+
+        def render(result: dict):
+            for key, _ in SECTIONS:
+                if key in result:
+                    placeholders[key].write(result[key])
+                else:
+                    placeholders[key].caption("Checking policies...")
+
+        query = question.strip()
+        try:
+            render(cached_answer(query, token))
+        except LookupError:
+            render({})
+            try:
+                result = {}
+                for result in stream_answer(query, token):
+                    render(result)
+                if "answer" in result:
+                    cached_answer(query, token, _result=dict(result))
+                else:
+                    st.error("The answer stream ended early; please try again.")
+            except (requests.RequestException, RuntimeError) as e:
+                st.error(str(e))
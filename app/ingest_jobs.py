@@ -0,0 +1,178 @@
+# ingest_jobs.py
+# Background ingestion jobs: each job builds a fresh Pinecone snapshot and only
+# swaps it in once complete, so queries keep using the previous one meanwhile.
+from concurrent.futures import ThreadPoolExecutor
+import logging
+import os
+import threading
+import time
+import uuid
+from pathlib import Path
+from pinecone_embeddings import build_snapshot, IngestCancelled
+
+logger = logging.getLogger(__name__)
+
+# Jobs run one at a time (each swap must see the snapshot it replaces);
+# INGEST_WORKERS controls how many files a job embeds concurrently.
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", "4"))
+DEFAULT_INGEST_FOLDER = os.getenv("INGEST_FOLDER", "..\\input_policies")
+# Finished jobs beyond this many (oldest first) are dropped from the registry.
+MAX_FINISHED_JOBS = int(os.getenv("INGEST_MAX_FINISHED_JOBS", "100"))
+FINISHED_STATUSES = ("succeeded", "failed", "cancelled")
+ACTIVE_STATUSES = ("queued", "running")
+
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ingest")
+_jobs = {}
+_jobs_lock = threading.Lock()
+
+
+class IngestJobActive(Exception):
+    """Raised by submit_job while another job is still queued or running."""
+
+    def __init__(self, job):
+        super().__init__(f"Ingestion job {job.job_id} is already {job.status}")
+        self.job = job
+
+
+class IngestJob:
+    def __init__(self, folder: str):
+        self.job_id = uuid.uuid4().hex
+        self.folder = folder
+        self.status = "queued"  # queued | running | succeeded | failed | cancelled
+        self.namespace = None
+        self.error = None
+        self.files_total = 0
+        self.files_done = 0
+        self.chunks = 0
+        self.tokens = 0
+        self.started_at = None
+        self.finished_at = None
+        self.cancel_event = threading.Event()
+        self._lock = threading.Lock()
+
+    def record(self, files_total=None, files=0, chunks=0, tokens=0):
+        """Progress callback handed to build_snapshot; called from worker threads."""
+        with self._lock:
+            if files_total is not None:
+                self.files_total = files_total
+            self.files_done += files
+            self.chunks += chunks
+            self.tokens += tokens
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            end = self.finished_at or time.monotonic()
+            elapsed = end - self.started_at if self.started_at else 0.0
+            return {
+                "job_id": self.job_id,
+                "status": self.status,
+                "folder": self.folder,
+                "namespace": self.namespace,
+                "files_total": self.files_total,
+                "files_done": self.files_done,
+                "chunks": self.chunks,
+                "tokens": self.tokens,
+                "elapsed_seconds": round(elapsed, 2),
+                "chunks_per_second": round(self.chunks / elapsed, 2) if elapsed else 0.0,
+                "tokens_per_second": round(self.tokens / elapsed, 2) if elapsed else 0.0,
+                "error": self.error,
+            }
+
+    def _set_status(self, status: str, **fields):
+        with self._lock:
+            self.status = status
+            for key, value in fields.items():
+                setattr(self, key, value)
+
+    def _start(self) -> bool:
+        """Move queued -> running; False if the job was cancelled while queued."""
+        with self._lock:
+            if self.status != "queued":
+                return False
+            self.status = "running"
+            self.started_at = time.monotonic()
+            return True
+
+    def _cancel(self):
+        with self._lock:
+            self.cancel_event.set()
+            if self.status == "queued":
+                self.status = "cancelled"
+                self.finished_at = time.monotonic()
+
+
+def _resolve_folder(folder: str = None) -> str:
+    """Resolve folder relative to INGEST_FOLDER, refusing anything outside it."""
+    base = Path(DEFAULT_INGEST_FOLDER).resolve()
+    target = (base / folder).resolve() if folder else base
+    if target != base and base not in target.parents:
+        raise ValueError(f"Folder must be inside {DEFAULT_INGEST_FOLDER}")
+    return str(target)
+
+
+def _evict_finished_jobs():
+    # Caller holds _jobs_lock; dict order is submission order, so oldest go first.
+    finished = [job_id for job_id, job in _jobs.items() if job.status in FINISHED_STATUSES]
+    for job_id in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+        del _jobs[job_id]
+
+
+def _run(job: IngestJob):
+    if not job._start():
+        return
+
+    logger.info(f"Ingestion job {job.job_id} started for {job.folder}")
+    try:
+        namespace = build_snapshot(job.folder, progress=job.record,
+                                   cancel_event=job.cancel_event, workers=INGEST_WORKERS)
+    except IngestCancelled:
+        logger.info(f"Ingestion job {job.job_id} cancelled")
+        job._set_status("cancelled", finished_at=time.monotonic())
+    except Exception as e:
+        logger.error(f"Ingestion job {job.job_id} failed: {e}")
+        job._set_status("failed", error=str(e), finished_at=time.monotonic())
+    else:
+        logger.info(f"Ingestion job {job.job_id} activated namespace {namespace}")
+        job._set_status("succeeded", namespace=namespace, finished_at=time.monotonic())
+
+
+def submit_job(folder: str = None) -> IngestJob:
+    """
+    Queue an ingestion job. folder is taken relative to INGEST_FOLDER; a
+    ValueError is raised if it resolves outside it. Each run rebuilds the
+    whole index, so IngestJobActive is raised while one is already pending.
+    """
+    job = IngestJob(_resolve_folder(folder))
+    with _jobs_lock:
+        for existing in _jobs.values():
+            if existing.status in ACTIVE_STATUSES:
+                raise IngestJobActive(existing)
+        _evict_finished_jobs()
+        _jobs[job.job_id] = job
+        _executor.submit(_run, job)
+    return job
+
+
+def get_job(job_id: str):
+    with _jobs_lock:
+        return _jobs.get(job_id)
+
+
+def cancel_job(job_id: str):
+    """
+    Cancel a job. Queued jobs are marked cancelled immediately; running jobs
+    stop at their next batch boundary.
+    """
+    job = get_job(job_id)
+    if job is not None:
+        job._cancel()
+    return job
+
+
+def shutdown():
+    """Cancel pending and running jobs, then stop the worker (called on API shutdown)."""
+    with _jobs_lock:
+        for job in _jobs.values():
+            if job.status in ACTIVE_STATUSES:
+                job._cancel()
+    _executor.shutdown(cancel_futures=True)
@@ -61,25 +61,32 @@ def fetch_standard_web_text(standard_name: str) -> str:
         return ""
     return search.run(standard_name)
 
-def answer_user_query(user_query: str) -> dict:
-
+def stream_user_query(user_query: str):
+    """
+    Yield partial results as each stage completes, so callers can render the
+    standard, web reference and internal policies before the final answer.
+    """
     try:
         safe_query = sanitize_input(user_query)
     except ValueError as e:
-        return {
+        yield {
             "answer": str(e),
             "internal_policies": "",
             "web_reference": "",
             "standard": None
         }
+        return
     # Extract standard
     standard_name = extract_reference_standard(safe_query)
+    yield {"standard": standard_name}
     
     # Fetch web info
     web_text = fetch_standard_web_text(standard_name)
+    yield {"web_reference": web_text}
     
     # Fetch internal policies
     internal_text = fetch_internal_policies(safe_query)
+    yield {"internal_policies": internal_text}
     
     # Generate final answer
     combined_prompt = f"""
@@ -103,14 +110,14 @@ Provide a clear answer, citations, and recommendations if necessary.
     ]
     result = guard.generate(messages=messages)
 
-    safe_answer = sanitize_output(result["content"])
-    
-    return {
-        "answer": safe_answer,
-        "internal_policies": internal_text,
-        "web_reference": web_text,
-        "standard": standard_name
-    }
+    yield {"answer": sanitize_output(result["content"])}
+
+
+def answer_user_query(user_query: str) -> dict:
+    result = {}
+    for partial in stream_user_query(user_query):
+        result.update(partial)
+    return result
     
 
 if __name__ == "__main__":
@@ -2,7 +2,12 @@ from openai import OpenAI
 from pinecone import Pinecone
 from dotenv import load_dotenv
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_EXCEPTION
+from datetime import datetime, timezone
+import json
+import logging
 import os
+import threading
 from ingest import load_documents_from_folder, chunk_text
 from langchain_pinecone import PineconeVectorStore 
 from langchain_openai import OpenAIEmbeddings
@@ -11,6 +16,8 @@ from langchain_openai import ChatOpenAI
 
 load_dotenv(override=True)
 
+logger = logging.getLogger(__name__)
+
 client = OpenAI()
 llm = ChatOpenAI(model="gpt-4o-mini", temperature=0)
 pinecone_api_key = os.getenv("PINECONE_API_KEY")
@@ -19,9 +26,35 @@ pine = Pinecone(api_key=pinecone_api_key)
 index = pine.Index("policies")
 
 embeddings = OpenAIEmbeddings(model="text-embedding-3-small", dimensions=512)
-# Instantiate the Pinecone vector store (not the class itself)
-vector_store = PineconeVectorStore(index_name="policies", embedding=embeddings,text_key="text")
-retriever = vector_store.as_retriever(search_kwargs={"k": 5})
+
+# Each ingestion run writes into its own namespace ("snapshot"). The pointer file
+# records which snapshot queries are served from; "" is Pinecone's default namespace.
+NAMESPACE_FILE = Path(os.getenv("PINECONE_NAMESPACE_FILE", Path(__file__).with_name("active_namespace.json")))
+UPSERT_BATCH_SIZE = 100
+_swap_lock = threading.Lock()
+
+
+class IngestCancelled(Exception):
+    """Raised when an ingestion run is cancelled before it completes."""
+
+
+def _load_namespaces() -> dict:
+    try:
+        with open(NAMESPACE_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {"active": "", "previous": None}
+
+
+def _build_retriever(namespace: str):
+    # Instantiate the Pinecone vector store (not the class itself)
+    store = PineconeVectorStore(index_name="policies", embedding=embeddings, text_key="text",
+                                namespace=namespace or None)
+    return store, store.as_retriever(search_kwargs={"k": 5})
+
+
+namespaces = _load_namespaces()
+vector_store, retriever = _build_retriever(namespaces["active"])
 
 def embed_query(query: str):
     """Generate embedding vector for the query string."""
@@ -34,7 +67,8 @@ def embed_query(query: str):
 def retrieve_context(question: str, top_k: int = 5):
     """Retrieve top_k relevant chunks from Pinecone for the given question."""
     query_vec = embed_query(question)
-    results = index.query(vector=query_vec, top_k=top_k, include_metadata=True)
+    results = index.query(vector=query_vec, top_k=top_k, include_metadata=True,
+                          namespace=namespaces["active"])
     
     # Extract text chunks + metadata
     contexts = []
@@ -48,26 +82,123 @@ def retrieve_context(question: str, top_k: int = 5):
     return contexts
 
 
-def ingest_document(docPath: str):
-    documents = load_documents_from_folder(docPath)
-    
-    for name, content in documents.items():
-        chunks = chunk_text(content) 
-        # Create embeddings for all chunks in one call
+def _ingest_file(name: str, content: str, namespace: str, progress, stop_events):
+    chunks = [c for c in chunk_text(content) if c]
+    tokens = 0
+    for start in range(0, len(chunks), UPSERT_BATCH_SIZE):
+        if any(e.is_set() for e in stop_events):
+            raise IngestCancelled(f"Cancelled while ingesting {name}")
+        batch = chunks[start:start + UPSERT_BATCH_SIZE]
+        # Create embeddings for the whole batch in one call
         resp = client.embeddings.create(
-            input=chunks,
+            input=batch,
             model="text-embedding-3-small",
             dimensions=512,
         )
 
         vectors = []
-        for i, (chunk, d) in enumerate(zip(chunks, resp.data)):
-            emb = d.embedding
+        for i, (chunk, d) in enumerate(zip(batch, resp.data), start=start):
             chunk_id = f"{Path(name).stem}_chunk_{i}"
-            vectors.append((chunk_id, emb, {"source": name, "chunk": i, "text": chunk}))
-           
-            index.upsert(vectors=vectors)
-        
+            vectors.append((chunk_id, d.embedding, {"source": name, "chunk": i, "text": chunk}))
+        index.upsert(vectors=vectors, namespace=namespace)
+
+        tokens += resp.usage.total_tokens
+        if progress is not None:
+            progress(chunks=len(batch), tokens=resp.usage.total_tokens)
+    if progress is not None:
+        progress(files=1)
+    return len(chunks), tokens
+
+
+def ingest_document(docPath: str, namespace: str = "", progress=None, cancel_event=None, workers: int = 4):
+    """
+    Embed every supported document in docPath and upsert it into namespace.
+    Files are embedded concurrently; progress (if given) is called with
+    files_total once, then with files/chunks/tokens increments as work completes.
+    """
+    documents = load_documents_from_folder(docPath)
+    if progress is not None:
+        progress(files_total=len(documents))
+
+    # Workers stop on the caller's cancel_event, or on our own stop_event once
+    # any file has failed; the caller's event is never set here.
+    stop_event = threading.Event()
+    stop_events = [stop_event] if cancel_event is None else [stop_event, cancel_event]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(_ingest_file, name, content, namespace, progress, stop_events)
+            for name, content in documents.items()
+        ]
+        try:
+            # Return as soon as any file fails rather than in submission order.
+            done, _ = wait(futures, return_when=FIRST_EXCEPTION)
+            for f in done:
+                if f.exception() is not None:
+                    raise f.exception()
+            results = [f.result() for f in futures]
+        except BaseException:
+            stop_event.set()
+            for f in futures:
+                f.cancel()  # files not yet started
+            raise
+
+    return {
+        "files": len(results),
+        "chunks": sum(r[0] for r in results),
+        "tokens": sum(r[1] for r in results),
+    }
+
+
+def activate_namespace(namespace: str):
+    """
+    Atomically switch queries to namespace. The replaced snapshot is kept as
+    "previous" so in-flight queries can finish; the one before it is deleted.
+    """
+    global namespaces, vector_store, retriever
+    # Build the new store outside the lock; queries only ever read the globals.
+    new_store, new_retriever = _build_retriever(namespace)
+    with _swap_lock:
+        stale = namespaces.get("previous")
+        updated = {"active": namespace, "previous": namespaces["active"]}
+
+        tmp = NAMESPACE_FILE.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(updated, f)
+        os.replace(tmp, NAMESPACE_FILE)
+
+        namespaces, vector_store, retriever = updated, new_store, new_retriever
+
+    if stale and stale not in (namespace, updated["previous"]):
+        # The swap has already happened; a failed cleanup must not undo it.
+        try:
+            index.delete(delete_all=True, namespace=stale)
+        except Exception as e:
+            logger.error(f"Failed to delete stale namespace {stale}: {e}")
+
+
+def build_snapshot(docPath: str, progress=None, cancel_event=None, workers: int = 4) -> str:
+    """
+    Ingest docPath into a fresh namespace and switch queries over to it once
+    complete. A failed or cancelled run is discarded and never becomes active.
+    """
+    namespace = "policies-" + datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+    try:
+        stats = ingest_document(docPath, namespace=namespace, progress=progress,
+                                cancel_event=cancel_event, workers=workers)
+        if not stats["chunks"]:
+            raise ValueError(f"No document chunks found in {docPath}")
+        if cancel_event is not None and cancel_event.is_set():
+            raise IngestCancelled("Cancelled before activation")
+    except BaseException:
+        try:
+            index.delete(delete_all=True, namespace=namespace)
+        except Exception as e:
+            # Also raised when nothing was upserted yet and the namespace doesn't exist.
+            logger.error(f"Failed to delete discarded namespace {namespace}: {e}")
+        raise
+    activate_namespace(namespace)
+    return namespace
+
 def fetch_internal_policies(user_query: str) -> str:
     docs_result = retriever.get_relevant_documents(user_query)  # OLD method works for now
 
@@ -80,4 +211,4 @@ def fetch_internal_policies(user_query: str) -> str:
     return internal_text
 
 if __name__ == "__main__":
-    ingest_document("..\\input_policies")
+    print("Active namespace:", build_snapshot("..\\input_policies"))